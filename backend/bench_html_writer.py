@@ -0,0 +1,98 @@
+"""
+HTML Writer Benchmark
+Converts a large input to HTML with txt_to_html, pdf_to_html or docx_to_html and reports
+throughput and peak memory
+
+Usage:
+    python bench_html_writer.py [--route txt|pdf|docx] [--size-mb 100]
+    python bench_html_writer.py --route pdf --input report.pdf
+
+Without --input a document is generated from --size-mb of text (PDFs via txt_to_pdf).
+Each conversion runs in a fresh process, so peak RSS isn't inflated by generating the input.
+"""
+
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+SAMPLE_LINE = "Lorem ipsum <dolor> sit & amet, consectetur \"adipiscing\" elit. 0123456789\n"
+
+ROUTES = {
+    'txt': 'txt_to_html',
+    'pdf': 'pdf_to_html',
+    'docx': 'docx_to_html',
+}
+
+
+def generate_input(route: str, size_mb: int, output_dir: Path) -> Path:
+    """
+    Writes size_mb of sample text and, for pdf/docx, converts it into that format
+    """
+    txt_path = output_dir / "input.txt"
+    block = SAMPLE_LINE * (1024 * 1024 // len(SAMPLE_LINE))
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        for _ in range(size_mb):
+            f.write(block)
+    if route == 'txt':
+        return txt_path
+
+    import converters
+    if route == 'pdf':
+        return converters.txt_to_pdf(txt_path, output_dir)
+    return converters.txt_to_docx(txt_path, output_dir)
+
+
+def _convert(route: str, input_path: Path, output_dir: Path, results):
+    """
+    Child process: runs one conversion and reports time and memory
+    """
+    import converters
+    convert = getattr(converters, ROUTES[route])
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    output_path = convert(input_path, output_dir)
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((elapsed, rss_before, rss_after, output_path.stat().st_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming HTML conversion")
+    parser.add_argument("--route", choices=sorted(ROUTES), default="txt", help="Input format to convert")
+    parser.add_argument("--input", type=Path, help="Convert this file instead of a generated one")
+    parser.add_argument("--size-mb", type=int, default=100, help="Text used to generate the input")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(tmp)
+        if args.input:
+            input_path = args.input
+        else:
+            # Generate in a child too, so none of it lingers in the measuring process
+            ctx = multiprocessing.get_context('spawn')
+            with ctx.Pool(1) as pool:
+                input_path = pool.apply(generate_input, (args.route, args.size_mb, output_dir))
+        size_mb = input_path.stat().st_size / (1024 * 1024)
+
+        ctx = multiprocessing.get_context('spawn')
+        results = ctx.Queue()
+        child = ctx.Process(target=_convert, args=(args.route, input_path, output_dir, results))
+        child.start()
+        elapsed, rss_before, rss_after, output_size = results.get()
+        child.join()
+
+        print(f"route:      {ROUTES[args.route]}")
+        print(f"input:      {size_mb:.1f} MB")
+        print(f"output:     {output_size / (1024 * 1024):.1f} MB")
+        print(f"time:       {elapsed:.2f} s")
+        print(f"throughput: {size_mb / elapsed:.1f} MB/s")
+        # ru_maxrss is in KB on Linux
+        print(f"peak RSS:   {rss_after / 1024:.1f} MB (+{(rss_after - rss_before) / 1024:.1f} MB during conversion)")
+
+
+if __name__ == "__main__":
+    main()
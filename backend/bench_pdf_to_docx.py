@@ -0,0 +1,64 @@
+"""
+PDF to DOCX Benchmark
+Times pdf_to_docx on a sample PDF with increasing worker counts and reports the speedup
+
+Usage: python bench_pdf_to_docx.py report.pdf [--workers 1 2 4 8] [--start-page N] [--end-page N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import converters
+from converters import pdf_page_chunks, pdf_page_count, pdf_to_docx
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel PDF to DOCX conversion")
+    parser.add_argument("pdf", type=Path, help="PDF file to convert")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="Worker counts to try (default: 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--start-page", type=int, default=None)
+    parser.add_argument("--end-page", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=2,
+                        help="Runs per worker count; the best is kept, so pool start-up isn't counted")
+    args = parser.parse_args()
+
+    worker_counts = args.workers
+    if not worker_counts:
+        cpus = os.cpu_count() or 1
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cpus:
+            worker_counts.append(worker_counts[-1] * 2)
+        if worker_counts[-1] != cpus:
+            worker_counts.append(cpus)
+
+    # Size the shared parsing pool for the largest count before it is first created
+    converters.PDF_TO_DOCX_WORKERS = max(worker_counts)
+
+    # pdf_to_docx caps the worker count so each worker gets enough pages; report what actually ran
+    page_count = pdf_page_count(args.pdf)
+    print(f"{page_count} pages")
+    print(f"{'requested':>9} {'workers':>8} {'seconds':>10} {'speedup':>8}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(tmp)
+        for workers in worker_counts:
+            effective = len(pdf_page_chunks(page_count, args.start_page, args.end_page, workers))
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                output_path = pdf_to_docx(args.pdf, output_dir, args.start_page, args.end_page, workers)
+                elapsed = time.perf_counter() - started
+                output_path.unlink()
+                best = elapsed if best is None else min(best, elapsed)
+            baseline = baseline or best
+            note = "" if effective == workers else "  (PDF too short for more workers)"
+            print(f"{workers:>9} {effective:>8} {best:>10.2f} {baseline / best:>7.2f}x{note}")
+    converters.shutdown_pdf_pool()
+
+
+if __name__ == "__main__":
+    main()
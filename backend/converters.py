@@ -9,14 +9,50 @@ import pdf2image
 import pdfplumber
 from pdf2docx import Converter as PDFToDocxConverter
 from docx import Document
+from docx.table import Table
 import pptx
 import pytesseract
 import pdfkit
+import multiprocessing
+import os
 import uuid
-import zipfile
-import io
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import base64
 
+from archiver import ARCHIVE_WORKERS, pil_format, write_archive
+from html_writer import HTMLWriter
+from tracing import span, traced
+
+
+# PDF -> DOCX parallelism
+# Long PDFs are parsed in page chunks on a shared per-process pool and merged back into
+# a single document. Short ranges aren't worth the hand-off, so they stay in-process.
+# The pool is sized so all uvicorn workers (WEB_CONCURRENCY) together use about one
+# parse process per core, however many conversions are running at once.
+PDF_TO_DOCX_WORKERS = int(os.getenv("PDF_TO_DOCX_WORKERS", "0")) or max(
+    (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", "1")), 1
+)
+PDF_TO_DOCX_MIN_PAGES_PER_WORKER = 4
+
+# Resolution used when rasterizing PDF pages to images
+PDF_RASTER_DPI = 300
+
+# Stylesheets for the HTML outputs
+PDF_HTML_STYLE = """        body { font-family: Arial, sans-serif; padding: 20px; }
+        .page { margin-bottom: 40px; padding: 20px; border: 1px solid #ccc; }"""
+DOCX_HTML_STYLE = """        body { font-family: Arial, sans-serif; padding: 20px; max-width: 800px; margin: 0 auto; }
+        p { margin: 10px 0; }
+        table { border-collapse: collapse; margin: 10px 0; }
+        td { border: 1px solid #ccc; padding: 4px 8px; }"""
+TXT_HTML_STYLE = """        body { font-family: monospace; padding: 20px; white-space: pre-wrap; }"""
+
+
+class InvalidPageRange(ValueError):
+    """
+    Raised when a requested page range falls outside the document
+    """
+
 
 def get_valid_output_formats(input_format: str) -> list:
     """
@@ -39,9 +75,11 @@ def get_valid_output_formats(input_format: str) -> list:
 # PDF CONVERSIONS
 # ============================================================================
 
-def convert_pdf_to_format(input_path: Path, output_format: str, output_dir: Path) -> Path:
+def convert_pdf_to_format(input_path: Path, output_format: str, output_dir: Path,
+                          start_page: int = None, end_page: int = None) -> Path:
     """
     Converts PDF to various formats
+    start_page/end_page (1-based, inclusive) limit the DOCX conversion to a page range
     """
     if output_format in ['png', 'jpg', 'webp']:
         return pdf_to_image(input_path, output_format, output_dir)
@@ -50,35 +88,50 @@ def convert_pdf_to_format(input_path: Path, output_format: str, output_dir: Path
     elif output_format == 'html':
         return pdf_to_html(input_path, output_dir)
     elif output_format == 'docx':
-        return pdf_to_docx(input_path, output_dir)
+        return pdf_to_docx(input_path, output_dir, start_page, end_page)
     else:
         raise ValueError(f"Unsupported conversion: PDF to {output_format}")
 
 
+def _rasterize_pdf_pages(input_path: Path, page_count: int, batch_size: int):
+    """
+    Yields PDF pages as images, rasterizing batch_size pages at a time
+    Only the current batch is held here, so memory stays bounded on long documents
+    """
+    for first_page in range(1, page_count + 1, batch_size):
+        last_page = min(first_page + batch_size - 1, page_count)
+        with span("pdf.rasterize", dpi=PDF_RASTER_DPI, first_page=first_page, last_page=last_page):
+            batch = pdf2image.convert_from_path(
+                input_path, dpi=PDF_RASTER_DPI, first_page=first_page, last_page=last_page
+            )
+        yield from batch
+
+
+@traced
 def pdf_to_image(input_path: Path, image_format: str, output_dir: Path) -> Path:
     """
     Converts PDF pages to images
-    If PDF has multiple pages, creates a ZIP file with all images
+    If PDF has multiple pages, packages all images into an archive (ZIP by default)
     """
-    # Convert PDF to images (one image per page)
-    images = pdf2image.convert_from_path(input_path, dpi=300)
+    page_count = pdf2image.pdfinfo_from_path(input_path)["Pages"]
     
-    if len(images) == 1:
+    if page_count == 1:
         # Single page - return single image
+        with span("pdf.rasterize", dpi=PDF_RASTER_DPI):
+            image = pdf2image.convert_from_path(input_path, dpi=PDF_RASTER_DPI)[0]
         output_path = output_dir / f"{uuid.uuid4()}.{image_format}"
-        images[0].save(output_path, image_format.upper())
+        with span("image.encode", format=image_format):
+            image.save(output_path, pil_format(image_format))
         return output_path
     else:
-        # Multiple pages - create ZIP
-        zip_path = output_dir / f"{uuid.uuid4()}.zip"
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for i, img in enumerate(images, 1):
-                img_bytes = io.BytesIO()
-                img.save(img_bytes, format=image_format.upper())
-                zipf.writestr(f"page_{i}.{image_format}", img_bytes.getvalue())
-        return zip_path
+        # Multiple pages - rasterize in batches the size of the encoder pool and stream
+        # them into the archive, so only a few pages are ever held in memory
+        pages = _rasterize_pdf_pages(input_path, page_count, ARCHIVE_WORKERS)
+        with span("archive", entries=page_count, format=image_format):
+            return write_archive(pages, "page", image_format, output_dir)
 
 
+@traced
 def pdf_to_txt(input_path: Path, output_dir: Path) -> Path:
     """
     Extracts text from PDF
@@ -98,51 +151,158 @@ def pdf_to_txt(input_path: Path, output_dir: Path) -> Path:
     return output_path
 
 
+@traced
 def pdf_to_html(input_path: Path, output_dir: Path) -> Path:
     """
     Converts PDF to HTML
+    Each page is written as its own block as soon as it is extracted
     """
     output_path = output_dir / f"{uuid.uuid4()}.html"
     
-    # Extract text and create simple HTML
-    text_content = []
-    with pdfplumber.open(input_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                text_content.append(f"<div class='page'>{text.replace(chr(10), '<br>')}</div>")
-    
-    html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Converted PDF</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; padding: 20px; }}
-        .page {{ margin-bottom: 40px; padding: 20px; border: 1px solid #ccc; }}
-    </style>
-</head>
-<body>
-    {''.join(text_content)}
-</body>
-</html>"""
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    with HTMLWriter(output_path, "Converted PDF", PDF_HTML_STYLE) as html:
+        with pdfplumber.open(input_path) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+                if text:
+                    html.page(text)
+                # Drop the parsed page so memory stays flat on long documents
+                page.close()
     
     return output_path
 
 
-def pdf_to_docx(input_path: Path, output_dir: Path) -> Path:
+_pdf_pool = None
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared PDF parsing pool, creating it on first use
+    Workers are started with forkserver (spawn where unavailable) rather than fork, so
+    they never inherit the server's threads (tracing exporter, profiler, event loop)
+    """
+    global _pdf_pool
+    if _pdf_pool is None:
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=PDF_TO_DOCX_WORKERS, mp_context=multiprocessing.get_context(method)
+        )
+    return _pdf_pool
+
+
+def shutdown_pdf_pool():
+    """
+    Stops the shared PDF parsing pool's worker processes
+    """
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(cancel_futures=True)
+        _pdf_pool = None
+
+
+def _parse_pdf_pages_chunk(pdf_path: str, start: int, end: int, json_path: str) -> str:
+    """
+    Worker: parses pages [start, end) of a PDF and serializes the layout to JSON
+    """
+    cv = PDFToDocxConverter(pdf_path)
+    try:
+        settings = cv.default_settings
+        cv.load_pages(start, end) \
+            .parse_document(**settings) \
+            .parse_pages(**settings) \
+            .serialize(json_path)
+    finally:
+        cv.close()
+    return json_path
+
+
+def pdf_page_count(input_path: Path) -> int:
+    """
+    Returns the number of pages in a PDF
+    """
+    cv = PDFToDocxConverter(str(input_path))
+    try:
+        return len(cv.fitz_doc)
+    finally:
+        cv.close()
+
+
+def pdf_page_chunks(page_count: int, start_page: int = None, end_page: int = None,
+                    workers: int = None) -> list:
+    """
+    Splits a page range into contiguous (start, end) chunks, one per worker process
+    start_page/end_page are 1-based and inclusive; chunks use pdf2docx's 0-based start
+    and exclusive end. A single chunk means the range is converted in-process.
+    """
+    # Never plan more chunks than the shared pool can run at once
+    workers = min(workers or PDF_TO_DOCX_WORKERS, PDF_TO_DOCX_WORKERS)
+    
+    start = max((start_page or 1) - 1, 0)
+    end = min(end_page or page_count, page_count)
+    if start >= end:
+        raise InvalidPageRange(f"Invalid page range {start_page}-{end_page} for a {page_count}-page PDF")
+    
+    # Only fan out when every worker gets a worthwhile chunk of pages
+    workers = max(min(workers, (end - start) // PDF_TO_DOCX_MIN_PAGES_PER_WORKER), 1)
+    
+    # Spread the pages evenly: the first `extra` chunks get one page more than the rest
+    base, extra = divmod(end - start, workers)
+    chunks = []
+    chunk_start = start
+    for i in range(workers):
+        chunk_end = chunk_start + base + (1 if i < extra else 0)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return chunks
+
+
+@traced
+def pdf_to_docx(input_path: Path, output_dir: Path, start_page: int = None,
+                end_page: int = None, workers: int = None) -> Path:
     """
     Converts PDF to DOCX
+    Long documents are split into page chunks, parsed in parallel worker processes
+    and merged into a single DOCX
+    start_page/end_page (1-based, inclusive) convert only part of the document
     """
     output_path = output_dir / f"{uuid.uuid4()}.docx"
     
     # Use pdf2docx library
     cv = PDFToDocxConverter(str(input_path))
-    cv.convert(str(output_path))
-    cv.close()
+    try:
+        chunks = pdf_page_chunks(len(cv.fitz_doc), start_page, end_page, workers)
+        start, end = chunks[0][0], chunks[-1][1]
+        if len(chunks) == 1:
+            cv.convert(str(output_path), start=start, end=end)
+            return output_path
+        
+        # Intermediate layouts go next to the output so concurrent requests never collide
+        json_paths = [output_dir / f"{output_path.stem}_{i}.json" for i in range(len(chunks))]
+        
+        try:
+            with span("pdf2docx.parse", workers=len(chunks), pages=end - start):
+                pool = _get_pdf_pool()
+                futures = [
+                    pool.submit(_parse_pdf_pages_chunk, str(input_path), s, e, str(json_path))
+                    for (s, e), json_path in zip(chunks, json_paths)
+                ]
+                try:
+                    for future in futures:
+                        future.result()
+                except BrokenProcessPool:
+                    # A crashed worker breaks the pool for good; start a fresh one next time
+                    shutdown_pdf_pool()
+                    raise
+            
+            # Merge the parsed chunks back in page order and write the document
+            with span("pdf2docx.merge"):
+                for json_path in json_paths:
+                    cv.deserialize(str(json_path))
+                cv.make_docx(str(output_path), **cv.default_settings)
+        finally:
+            for json_path in json_paths:
+                json_path.unlink(missing_ok=True)
+    finally:
+        cv.close()
     
     return output_path
 
@@ -169,6 +329,7 @@ def convert_docx_to_format(input_path: Path, output_format: str, output_dir: Pat
         raise ValueError(f"Unsupported conversion: DOCX to {output_format}")
 
 
+@traced
 def docx_to_pdf(input_path: Path, output_dir: Path) -> Path:
     """
     Converts DOCX to PDF using HTML intermediate
@@ -178,17 +339,19 @@ def docx_to_pdf(input_path: Path, output_dir: Path) -> Path:
     output_path = output_dir / f"{uuid.uuid4()}.pdf"
     
     # Configure pdfkit to use the installed wkhtmltopdf
-    try:
-        # Standard path in Debian/Ubuntu (Docker)
-        config = pdfkit.configuration(wkhtmltopdf='/usr/bin/wkhtmltopdf')
-        pdfkit.from_file(str(html_path), str(output_path), configuration=config)
-    except OSError:
-        # Fallback for local development if not in standard path
-        pdfkit.from_file(str(html_path), str(output_path))
+    with span("wkhtmltopdf"):
+        try:
+            # Standard path in Debian/Ubuntu (Docker)
+            config = pdfkit.configuration(wkhtmltopdf='/usr/bin/wkhtmltopdf')
+            pdfkit.from_file(str(html_path), str(output_path), configuration=config)
+        except OSError:
+            # Fallback for local development if not in standard path
+            pdfkit.from_file(str(html_path), str(output_path))
         
     return output_path
 
 
+@traced
 def docx_to_txt(input_path: Path, output_dir: Path) -> Path:
     """
     Extracts text from DOCX
@@ -207,36 +370,38 @@ def docx_to_txt(input_path: Path, output_dir: Path) -> Path:
     return output_path
 
 
+@traced
 def docx_to_html(input_path: Path, output_dir: Path) -> Path:
     """
     Converts DOCX to HTML
+    Keeps headings, bulleted/numbered lists and tables in document order
     """
     output_path = output_dir / f"{uuid.uuid4()}.html"
     
     doc = Document(input_path)
-    html_parts = []
     
-    for paragraph in doc.paragraphs:
-        if paragraph.text.strip():
-            html_parts.append(f"<p>{paragraph.text}</p>")
-    
-    html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Converted Document</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; padding: 20px; max-width: 800px; margin: 0 auto; }}
-        p {{ margin: 10px 0; }}
-    </style>
-</head>
-<body>
-    {''.join(html_parts)}
-</body>
-</html>"""
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    with HTMLWriter(output_path, "Converted Document", DOCX_HTML_STYLE) as html:
+        for block in doc.iter_inner_content():
+            if isinstance(block, Table):
+                html.table([cell.text for cell in row.cells] for row in block.rows)
+                continue
+            
+            text = block.text
+            if not text.strip():
+                continue
+            
+            style_name = block.style.name if block.style is not None else ''
+            if style_name == 'Title':
+                html.heading(1, text)
+            elif style_name.startswith('Heading'):
+                level = style_name.replace('Heading', '').strip()
+                html.heading(int(level) if level.isdigit() else 1, text)
+            elif style_name.startswith('List Bullet'):
+                html.list_item(text)
+            elif style_name.startswith('List Number'):
+                html.list_item(text, ordered=True)
+            else:
+                html.paragraph(text)
     
     return output_path
 
@@ -257,6 +422,7 @@ def convert_pptx_to_format(input_path: Path, output_format: str, output_dir: Pat
         raise ValueError(f"Unsupported conversion: PPTX to {output_format}")
 
 
+@traced
 def pptx_to_pdf(input_path: Path, output_dir: Path) -> Path:
     """
     Converts PPTX to PDF via images
@@ -287,26 +453,22 @@ def pptx_to_pdf(input_path: Path, output_dir: Path) -> Path:
     return output_path
 
 
+@traced
 def pptx_to_images(input_path: Path, image_format: str, output_dir: Path) -> Path:
     """
-    Converts PPTX slides to images (returns ZIP)
+    Converts PPTX slides to images (returns an archive, ZIP by default)
     """
     # This is a simplified version
     # In production, you'd use tools like unoconv or LibreOffice
     
-    zip_path = output_dir / f"{uuid.uuid4()}.zip"
-    
     prs = pptx.Presentation(input_path)
     
-    with zipfile.ZipFile(zip_path, 'w') as zipf:
-        for i, slide in enumerate(prs.slides, 1):
-            # Create a simple placeholder image with slide number
-            img = Image.new('RGB', (1920, 1080), color='white')
-            img_bytes = io.BytesIO()
-            img.save(img_bytes, format=image_format.upper())
-            zipf.writestr(f"slide_{i}.{image_format}", img_bytes.getvalue())
+    # Create a simple placeholder image per slide, lazily so only the pages being
+    # encoded are held in memory
+    slide_images = (Image.new('RGB', (1920, 1080), color='white') for _ in prs.slides)
     
-    return zip_path
+    with span("archive", entries=len(prs.slides), format=image_format):
+        return write_archive(slide_images, "slide", image_format, output_dir)
 
 
 # ============================================================================
@@ -327,6 +489,7 @@ def convert_txt_to_format(input_path: Path, output_format: str, output_dir: Path
         raise ValueError(f"Unsupported conversion: TXT to {output_format}")
 
 
+@traced
 def txt_to_pdf(input_path: Path, output_dir: Path) -> Path:
     """
     Converts TXT to PDF
@@ -365,6 +528,7 @@ def txt_to_pdf(input_path: Path, output_dir: Path) -> Path:
     return output_path
 
 
+@traced
 def txt_to_docx(input_path: Path, output_dir: Path) -> Path:
     """
     Converts TXT to DOCX
@@ -383,34 +547,17 @@ def txt_to_docx(input_path: Path, output_dir: Path) -> Path:
     return output_path
 
 
+@traced
 def txt_to_html(input_path: Path, output_dir: Path) -> Path:
     """
     Converts TXT to HTML
+    The text is streamed through in chunks, so large files don't need to fit in memory
     """
     output_path = output_dir / f"{uuid.uuid4()}.html"
     
-    with open(input_path, 'r', encoding='utf-8') as f:
-        text = f.read()
-    
-    # Convert line breaks to <br> tags
-    html_text = text.replace('\n', '<br>\n')
-    
-    html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Converted Text</title>
-    <style>
-        body {{ font-family: monospace; padding: 20px; white-space: pre-wrap; }}
-    </style>
-</head>
-<body>
-{html_text}
-</body>
-</html>"""
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    # pre-wrap keeps the original line breaks and spacing without <br> tags
+    with HTMLWriter(output_path, "Converted Text", TXT_HTML_STYLE) as html:
+        html.copy_text_file(input_path)
     
     return output_path
 
@@ -433,6 +580,7 @@ def convert_image_to_format(input_path: Path, output_format: str, output_dir: Pa
         raise ValueError(f"Unsupported conversion: Image to {output_format}")
 
 
+@traced
 def image_to_txt_ocr(input_path: Path, output_dir: Path) -> Path:
     """
     Extracts text from image using OCR
@@ -442,7 +590,8 @@ def image_to_txt_ocr(input_path: Path, output_dir: Path) -> Path:
     try:
         # Open image and perform OCR
         img = Image.open(input_path)
-        text = pytesseract.image_to_string(img)
+        with span("tesseract"):
+            text = pytesseract.image_to_string(img)
         
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(text)
@@ -454,6 +603,7 @@ def image_to_txt_ocr(input_path: Path, output_dir: Path) -> Path:
     return output_path
 
 
+@traced
 def image_to_pdf(input_path: Path, output_dir: Path) -> Path:
     """
     Converts image to PDF
@@ -471,6 +621,7 @@ def image_to_pdf(input_path: Path, output_dir: Path) -> Path:
     return output_path
 
 
+@traced
 def image_to_image(input_path: Path, output_format: str, output_dir: Path) -> Path:
     """
     Converts between image formats
@@ -490,7 +641,7 @@ def image_to_image(input_path: Path, output_format: str, output_dir: Path) -> Pa
             img = rgb_img
         
         print(f"DEBUG: Saving to {output_path}")
-        img.save(output_path, output_format.upper())
+        img.save(output_path, pil_format(output_format))
         print("DEBUG: Save complete")
         
         return output_path
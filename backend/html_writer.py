@@ -0,0 +1,115 @@
+"""
+Streaming HTML Writer
+Writes escaped HTML straight to the output file so conversions run in constant memory
+"""
+
+from html import escape
+from pathlib import Path
+
+# Size of the blocks read from plain-text sources
+TEXT_CHUNK_SIZE = 1024 * 1024
+
+BASE_STYLE = "        body { font-family: Arial, sans-serif; padding: 20px; }"
+
+
+class HTMLWriter:
+    """
+    Writes an HTML document piece by piece
+    All text passed in is escaped; use as a context manager so the document is always closed
+
+        with HTMLWriter(output_path, "Converted PDF") as html:
+            html.heading(1, "Title")
+            html.paragraph("Body text")
+    """
+
+    def __init__(self, output_path: Path, title: str, style: str = BASE_STYLE):
+        self.output_path = output_path
+        self.title = title
+        self.style = style
+        self._file = None
+        self._open_list = None
+
+    def __enter__(self):
+        self._file = open(self.output_path, 'w', encoding='utf-8')
+        self._file.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n"
+            "    <meta charset=\"UTF-8\">\n"
+            f"    <title>{escape(self.title)}</title>\n"
+            f"    <style>\n{self.style}\n    </style>\n"
+            "</head>\n<body>\n"
+        )
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.end_list()
+            self._file.write("</body>\n</html>\n")
+        finally:
+            self._file.close()
+        return False
+
+    def write_text(self, text: str):
+        """
+        Writes escaped text with no surrounding markup
+        """
+        self._file.write(escape(text, quote=False))
+
+    def heading(self, level: int, text: str):
+        self.end_list()
+        level = min(max(level, 1), 6)
+        self._file.write(f"<h{level}>{escape(text, quote=False)}</h{level}>\n")
+
+    def paragraph(self, text: str):
+        self.end_list()
+        self._file.write(f"<p>{escape(text, quote=False)}</p>\n")
+
+    def list_item(self, text: str, ordered: bool = False):
+        """
+        Writes a list item, opening (or switching) the surrounding <ul>/<ol> as needed
+        Any other block closes the list
+        """
+        tag = 'ol' if ordered else 'ul'
+        if self._open_list != tag:
+            self.end_list()
+            self._file.write(f"<{tag}>\n")
+            self._open_list = tag
+        self._file.write(f"<li>{escape(text, quote=False)}</li>\n")
+
+    def end_list(self):
+        if self._open_list:
+            self._file.write(f"</{self._open_list}>\n")
+            self._open_list = None
+
+    def table(self, rows):
+        """
+        Writes a table from an iterable of rows, each an iterable of cell strings
+        """
+        self.end_list()
+        self._file.write("<table>\n")
+        for row in rows:
+            self._file.write("<tr>")
+            for cell in row:
+                self._file.write(f"<td>{escape(cell, quote=False)}</td>")
+            self._file.write("</tr>\n")
+        self._file.write("</table>\n")
+
+    def page(self, text: str):
+        """
+        Writes one page of extracted text as a <div class='page'> block, keeping line breaks
+        """
+        self.end_list()
+        self._file.write("<div class='page'>")
+        self._file.write(escape(text, quote=False).replace('\n', '<br>\n'))
+        self._file.write("</div>\n")
+
+    def copy_text_file(self, input_path: Path, chunk_size: int = TEXT_CHUNK_SIZE):
+        """
+        Streams a UTF-8 text file into the document in fixed-size escaped chunks
+        """
+        self.end_list()
+        with open(input_path, 'r', encoding='utf-8') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                self.write_text(chunk)
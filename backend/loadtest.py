@@ -0,0 +1,500 @@
+"""
+Load Test Harness
+Starts the API with several uvicorn workers (or targets a running server), replays a mix
+of conversion routes and upload sizes at a fixed request rate, and reports throughput,
+latency percentiles, error rates and server RSS/CPU over time
+
+Usage:
+    python loadtest.py --workers 4 --rate 5 --duration 60 \\
+        --mix txt:html=3,txt:pdf=1,png:jpg=2,pdf:txt=1 --sizes 10KB,1MB
+
+Latency is measured from each request's scheduled send time, so client-side queueing
+shows up in the numbers instead of silently lowering the offered load.
+Synthetic inputs are generated for every format; use --sample pdf=report.pdf to send a
+real file for a format instead.
+"""
+
+import argparse
+import http.client
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'txt': 'text/plain',
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'webp': 'image/webp',
+}
+
+# uvicorn drops idle keep-alive connections after 5 s by default; reconnect well before
+# that so a quiet client thread never sends on a socket the server has already closed
+KEEPALIVE_REUSE_SECONDS = 2.0
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+
+
+# ============================================================================
+# INPUT GENERATION
+# ============================================================================
+
+def parse_size(text: str) -> int:
+    """
+    Parses sizes like 512, 10KB or 2MB into bytes
+    """
+    text = text.strip().upper()
+    for suffix, factor in (('KB', 1024), ('MB', 1024 ** 2), ('GB', 1024 ** 3), ('B', 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+def _text_of_size(size: int) -> str:
+    rng = random.Random(size)
+    lines = []
+    total = 0
+    while total < size:
+        line = ' '.join(rng.choice(WORDS) for _ in range(12)) + '\n'
+        lines.append(line)
+        total += len(line)
+    return ''.join(lines)[:size]
+
+
+def _noise_image(size: int):
+    """
+    Random RGB image whose encoded size is roughly `size` bytes (noise doesn't compress)
+    """
+    from PIL import Image
+    side = max(int((size / 3) ** 0.5), 16)
+    return Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+
+
+def generate_input(input_format: str, size: int) -> bytes:
+    """
+    Builds a synthetic input file of roughly the requested size
+    """
+    if input_format == 'txt':
+        return _text_of_size(size).encode('utf-8')
+
+    buffer = io.BytesIO()
+    if input_format in ('png', 'jpg', 'webp', 'pdf'):
+        pil_format = {'jpg': 'JPEG'}.get(input_format, input_format.upper())
+        _noise_image(size).save(buffer, format=pil_format)
+    elif input_format == 'docx':
+        from docx import Document
+        doc = Document()
+        doc.add_heading('Load test document', level=1)
+        for paragraph in _text_of_size(size).split('\n'):
+            doc.add_paragraph(paragraph)
+        doc.save(buffer)
+    elif input_format == 'pptx':
+        import pptx
+        prs = pptx.Presentation()
+        for i in range(max(size // (50 * 1024), 1)):
+            slide = prs.slides.add_slide(prs.slide_layouts[1])
+            slide.shapes.title.text = f"Slide {i + 1}"
+            slide.placeholders[1].text = _text_of_size(500)
+        prs.save(buffer)
+    else:
+        raise ValueError(f"Cannot generate {input_format} input")
+    return buffer.getvalue()
+
+
+def build_multipart(filename: str, content: bytes, content_type: str, fields: dict):
+    """
+    Encodes a multipart/form-data body; returns (body, content-type header)
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'.encode()
+    )
+    parts.append(content)
+    parts.append(f'\r\n--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+def start_server(port: int, workers: int, workdir: Path) -> subprocess.Popen:
+    """
+    Starts uvicorn on the backend app with rate limiting disabled
+    uploads/ and outputs/ are created under workdir so the test leaves the repo untouched
+    """
+    # WEB_CONCURRENCY lets the app size per-process pools for the number of workers
+    env = dict(os.environ, RATE_LIMIT_ENABLED="false", PYTHONPATH=str(BACKEND_DIR),
+               WEB_CONCURRENCY=str(workers))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(BACKEND_DIR),
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+
+
+def wait_until_ready(host: str, port: int, server: subprocess.Popen = None, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode} during start-up")
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            try:
+                conn.request("GET", "/")
+                if conn.getresponse().status == 200:
+                    return
+            finally:
+                conn.close()
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server on {host}:{port} did not become ready in {timeout:.0f}s")
+
+
+def _process_tree(root_pid: int) -> list:
+    """
+    Returns root_pid and all of its descendants (Linux /proc)
+    """
+    children = defaultdict(list)
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        # The command name may contain spaces, so split after its closing paren
+        fields = stat[stat.rindex(')') + 2:].split()
+        children[int(fields[1])].append(int(entry.name))
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def sample_server_usage(root_pid: int):
+    """
+    Returns (total RSS in bytes, total CPU seconds) across the server's process tree
+    """
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    ticks = os.sysconf('SC_CLK_TCK')
+    rss = 0
+    cpu = 0.0
+    for pid in _process_tree(root_pid):
+        try:
+            rss += int(Path(f'/proc/{pid}/statm').read_text().split()[1]) * page_size
+            stat = Path(f'/proc/{pid}/stat').read_text()
+            fields = stat[stat.rindex(')') + 2:].split()
+            cpu += (int(fields[11]) + int(fields[12])) / ticks
+        except (OSError, IndexError, ValueError):
+            continue
+    return rss, cpu
+
+
+# ============================================================================
+# LOAD GENERATION
+# ============================================================================
+
+class LoadTest:
+    """
+    Open-loop load generator: requests are scheduled at a fixed rate regardless of how
+    fast the server answers, and sent from a bounded pool of client threads
+    """
+
+    def __init__(self, host: str, port: int, payloads: list, weights: list,
+                 rate: float, duration: float, concurrency: int, server_pid: int = None):
+        self.host = host
+        self.port = port
+        self.payloads = payloads
+        self.weights = weights
+        self.rate = rate
+        self.duration = duration
+        self.concurrency = concurrency
+        self.server_pid = server_pid
+        self.results = []
+        self.usage = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._done = threading.Event()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        """
+        Returns this thread's keep-alive connection, reopening it if it sat idle long
+        enough that the server may have closed it
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and time.perf_counter() - self._local.last_used > KEEPALIVE_REUSE_SECONDS:
+            self._close_connection()
+            conn = None
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=300)
+            self._local.conn = conn
+        return conn
+
+    def _close_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def _send(self, payload: dict, scheduled: float):
+        status = None
+        error = None
+        received = 0
+        try:
+            conn = self._connection()
+            conn.request("POST", "/api/convert", body=payload['body'],
+                         headers={'Content-Type': payload['content_type']})
+            response = conn.getresponse()
+            status = response.status
+            received = len(response.read())
+            self._local.last_used = time.perf_counter()
+        except (OSError, http.client.HTTPException) as e:
+            error = type(e).__name__
+            self._close_connection()
+        finished = time.perf_counter()
+        with self._lock:
+            self.results.append({
+                'route': payload['route'],
+                'size': payload['size'],
+                'sent_at': scheduled - self._started,
+                'latency': finished - scheduled,
+                'status': status,
+                'error': error,
+                'bytes_received': received,
+            })
+
+    def _monitor(self):
+        last_cpu = None
+        last_time = None
+        while not self._done.wait(1.0):
+            now = time.perf_counter()
+            rss, cpu = sample_server_usage(self.server_pid)
+            cpu_percent = None
+            if last_cpu is not None:
+                cpu_percent = (cpu - last_cpu) / (now - last_time) * 100
+            last_cpu, last_time = cpu, now
+            self.usage.append({'t': now - self._started, 'rss': rss, 'cpu_percent': cpu_percent})
+
+    def run(self):
+        rng = random.Random(0)
+        self._started = time.perf_counter()
+        monitor = None
+        if self.server_pid and Path('/proc').exists():
+            monitor = threading.Thread(target=self._monitor, daemon=True)
+            monitor.start()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            interval = 1.0 / self.rate
+            n = 0
+            while True:
+                scheduled = self._started + n * interval
+                if scheduled - self._started >= self.duration:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                payload = rng.choices(self.payloads, weights=self.weights)[0]
+                pool.submit(self._send, payload, scheduled)
+                n += 1
+
+        self.elapsed = time.perf_counter() - self._started
+        self._done.set()
+        if monitor:
+            monitor.join()
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not values:
+        return float('nan')
+    index = max(math.ceil(pct / 100 * len(values)) - 1, 0)
+    return values[index]
+
+
+def summarize(results: list, elapsed: float) -> dict:
+    latencies = sorted(r['latency'] for r in results)
+    errors = sum(1 for r in results if r['status'] != 200)
+    return {
+        'requests': len(results),
+        'throughput_rps': len(results) / elapsed if elapsed else 0.0,
+        'error_rate': errors / len(results) if results else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def build_report(test: LoadTest) -> dict:
+    by_route = defaultdict(list)
+    for r in test.results:
+        by_route[f"{r['route']} @ {r['size']}"].append(r)
+
+    # Per-second timeline, bucketed by scheduled send time
+    timeline = defaultdict(list)
+    for r in test.results:
+        timeline[int(r['sent_at'])].append(r)
+    usage_by_second = {int(u['t']): u for u in test.usage}
+    seconds = []
+    for second in sorted(set(timeline) | set(usage_by_second)):
+        bucket = timeline.get(second, [])
+        usage = usage_by_second.get(second, {})
+        seconds.append({
+            'second': second,
+            'requests': len(bucket),
+            'errors': sum(1 for r in bucket if r['status'] != 200),
+            'p95_ms': percentile(sorted(r['latency'] for r in bucket), 95) * 1000 if bucket else None,
+            'rss_mb': usage['rss'] / (1024 ** 2) if usage else None,
+            'cpu_percent': usage.get('cpu_percent'),
+        })
+
+    status_counts = defaultdict(int)
+    for r in test.results:
+        status_counts[str(r['status'] or r['error'])] += 1
+
+    return {
+        'overall': summarize(test.results, test.elapsed),
+        'routes': {route: summarize(results, test.elapsed) for route, results in sorted(by_route.items())},
+        'status_counts': dict(status_counts),
+        'timeline': seconds,
+    }
+
+
+def print_report(report: dict):
+    header = f"{'route':<24} {'reqs':>6} {'rps':>7} {'err%':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print('-' * len(header))
+    rows = list(report['routes'].items()) + [('TOTAL', report['overall'])]
+    for name, s in rows:
+        print(f"{name:<24} {s['requests']:>6} {s['throughput_rps']:>7.2f} {s['error_rate'] * 100:>5.1f}% "
+              f"{s['p50_ms']:>9.0f} {s['p95_ms']:>9.0f} {s['p99_ms']:>9.0f}")
+    print(f"\nstatus codes: {report['status_counts']}\n")
+
+    print(f"{'sec':>4} {'reqs':>5} {'errs':>5} {'p95 ms':>9} {'RSS MB':>8} {'CPU %':>7}")
+    for row in report['timeline']:
+        p95 = f"{row['p95_ms']:.0f}" if row['p95_ms'] is not None else '-'
+        rss = f"{row['rss_mb']:.0f}" if row['rss_mb'] is not None else '-'
+        cpu = f"{row['cpu_percent']:.0f}" if row['cpu_percent'] is not None else '-'
+        print(f"{row['second']:>4} {row['requests']:>5} {row['errors']:>5} {p95:>9} {rss:>8} {cpu:>7}")
+
+
+# ============================================================================
+# ENTRY POINT
+# ============================================================================
+
+def parse_mix(text: str) -> list:
+    """
+    Parses "txt:html=3,png:jpg=1" into [(input_format, output_format, weight), ...]
+    """
+    mix = []
+    for item in text.split(','):
+        route, _, weight = item.partition('=')
+        input_format, output_format = route.strip().split(':')
+        mix.append((input_format, output_format, float(weight or 1)))
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the conversion API")
+    parser.add_argument("--url", help="Test an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=2.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--concurrency", type=int, default=64, help="Max requests in flight")
+    parser.add_argument("--mix", default="txt:html=3,txt:pdf=1,png:jpg=2,png:webp=1",
+                        help="Weighted routes as input:output=weight")
+    parser.add_argument("--sizes", default="10KB,1MB", help="Upload sizes, picked uniformly")
+    parser.add_argument("--sample", action="append", default=[],
+                        help="Use a real file for a format, e.g. pdf=report.pdf (repeatable)")
+    parser.add_argument("--json", type=Path, help="Also write the full report as JSON")
+    args = parser.parse_args()
+
+    samples = {}
+    for item in args.sample:
+        input_format, _, path = item.partition('=')
+        samples[input_format] = Path(path)
+
+    # Pre-build every request body so the client spends its time sending, not encoding
+    payloads, weights = [], []
+    sizes = [s.strip() for s in args.sizes.split(',')]
+    for input_format, output_format, weight in parse_mix(args.mix):
+        # A real sample replaces the synthetic sizes for its format
+        if input_format in samples:
+            inputs = [(samples[input_format].name, samples[input_format].read_bytes())]
+        else:
+            inputs = [(size, generate_input(input_format, parse_size(size))) for size in sizes]
+        for size, content in inputs:
+            body, content_type = build_multipart(
+                f"loadtest.{input_format}", content, CONTENT_TYPES.get(input_format, 'application/octet-stream'),
+                {'output_format': output_format}
+            )
+            payloads.append({'route': f"{input_format}->{output_format}", 'size': size,
+                             'body': body, 'content_type': content_type})
+            weights.append(weight / len(inputs))
+
+    server = None
+    workdir = None
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        host, port = "127.0.0.1", args.port
+        workdir = tempfile.TemporaryDirectory(prefix="loadtest_")
+        server = start_server(port, args.workers, Path(workdir.name))
+
+    try:
+        wait_until_ready(host, port, server)
+        print(f"Running {args.duration:.0f}s at {args.rate} req/s against {host}:{port}"
+              + (f" ({args.workers} workers)" if server else ""))
+        test = LoadTest(host, port, payloads, weights, args.rate, args.duration,
+                        args.concurrency, server.pid if server else None)
+        test.run()
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+        if workdir:
+            workdir.cleanup()
+
+    report = build_report(test)
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,8 @@ from pathlib import Path
 import magic
 from datetime import datetime, timedelta
 import asyncio
-from typing import List
+from typing import List, Optional
+import time
 import uuid
 
 # Import conversion modules
@@ -22,7 +23,17 @@ from converters import (
     convert_pptx_to_format,
     convert_txt_to_format,
     convert_image_to_format,
-    get_valid_output_formats
+    get_valid_output_formats,
+    shutdown_pdf_pool,
+    InvalidPageRange
+)
+from tracing import (
+    init_tracing,
+    shutdown_tracing,
+    span,
+    record_span,
+    profile_conversion,
+    current_trace_id
 )
 
 # Initialize FastAPI app
@@ -38,7 +49,11 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi import Request
 
-limiter = Limiter(key_func=get_remote_address)
+# RATE_LIMIT_ENABLED=false turns limits off (e.g. for local load testing)
+limiter = Limiter(
+    key_func=get_remote_address,
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -55,6 +70,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST"],  # Restrict to needed methods only
     allow_headers=["*"],
+    # Lets the frontend read the real extension (e.g. .zip for multi-page outputs)
+    expose_headers=["Content-Disposition"],
 )
 
 # Create necessary directories
@@ -101,11 +118,37 @@ async def cleanup_old_files():
 async def startup_event():
     """
     Runs when the server starts
-    Initializes the automatic file cleanup task
+    Initializes the automatic file cleanup task and optional request tracing
     """
+    init_tracing()
     asyncio.create_task(cleanup_old_files())
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Runs when the server stops
+    Stops the PDF parsing workers and flushes any pending tracing spans
+    """
+    shutdown_pdf_pool()
+    shutdown_tracing()
+
+
+@app.middleware("http")
+async def trace_conversion_requests(request: Request, call_next):
+    """
+    Opens the root tracing span for conversion requests before their body is received
+    FastAPI reads and parses the whole upload before the endpoint runs, so a span that
+    starts in the endpoint would miss the upload entirely
+    """
+    if request.url.path != "/api/convert":
+        return await call_next(request)
+    
+    request.state.received_at_ns = time.time_ns()
+    with span("POST /api/convert", http_request_content_length=request.headers.get("content-length")):
+        return await call_next(request)
+
+
 @app.get("/")
 @limiter.limit("10/minute")
 async def root(request: Request):
@@ -166,70 +209,105 @@ async def detect_file_format(request: Request, file: UploadFile = File(...)):
 async def convert_file(
     request: Request,
     file: UploadFile = File(...),
-    output_format: str = Form(...)
+    output_format: str = Form(...),
+    start_page: Optional[int] = Form(None),
+    end_page: Optional[int] = Form(None)
 ):
     """
     Main conversion endpoint
     Accepts a file and desired output format, returns converted file
+    start_page/end_page (1-based, inclusive) optionally limit PDF to DOCX to a page range
     """
     input_path = None
     output_path = None
     
+    # Generate unique filename
+    unique_id = uuid.uuid4()
+    
+    # Time from the request arriving until the endpoint runs: receiving and parsing the upload
+    received_at_ns = getattr(request.state, "received_at_ns", None)
+    if received_at_ns is not None:
+        record_span("upload.receive", received_at_ns, time.time_ns(), upload_filename=file.filename)
+    
     try:
-        # Generate unique filename
-        unique_id = uuid.uuid4()
-        input_filename = f"{unique_id}_{file.filename}"
-        input_path = UPLOAD_DIR / input_filename
-        
-        # Save uploaded file using streaming (memory efficient)
-        with open(input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Detect input format
-        mime_type = magic.from_file(str(input_path), mime=True)
-        input_format = MIME_TO_EXT.get(mime_type)
-        
-        if not input_format:
-            input_format = Path(file.filename).suffix.lower().replace('.', '')
-        
-        # Validate conversion is possible
-        valid_formats = get_valid_output_formats(input_format)
-        if output_format not in valid_formats:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Cannot convert {input_format} to {output_format}"
+        with span("convert_file", request_id=str(unique_id), output_format=output_format), \
+                profile_conversion(str(unique_id)):
+            input_filename = f"{unique_id}_{file.filename}"
+            input_path = UPLOAD_DIR / input_filename
+            
+            # Save uploaded file using streaming (memory efficient)
+            with span("upload.copy_to_disk"):
+                with open(input_path, "wb") as buffer:
+                    shutil.copyfileobj(file.file, buffer)
+            
+            # Detect input format
+            with span("detect.magic"):
+                mime_type = magic.from_file(str(input_path), mime=True)
+            input_format = MIME_TO_EXT.get(mime_type)
+            
+            if not input_format:
+                input_format = Path(file.filename).suffix.lower().replace('.', '')
+            
+            # Validate conversion is possible
+            valid_formats = get_valid_output_formats(input_format)
+            if output_format not in valid_formats:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Cannot convert {input_format} to {output_format}"
+                )
+            
+            # Validate optional page range (only PDF to DOCX supports one)
+            if start_page is not None or end_page is not None:
+                if (input_format, output_format) != ('pdf', 'docx'):
+                    raise HTTPException(
+                        status_code=400,
+                        detail="Page ranges are only supported for PDF to DOCX"
+                    )
+                if (start_page is not None and start_page < 1) or (
+                    end_page is not None and end_page < (start_page or 1)
+                ):
+                    raise HTTPException(status_code=400, detail="Invalid page range")
+            
+            # Route to appropriate converter
+            output_filename = f"{unique_id}_converted.{output_format}"
+            output_path = OUTPUT_DIR / output_filename
+            
+            with span("convert", input_format=input_format, output_format=output_format,
+                      input_bytes=input_path.stat().st_size):
+                if input_format == 'pdf':
+                    output_path = convert_pdf_to_format(
+                        input_path, output_format, OUTPUT_DIR, start_page, end_page
+                    )
+                elif input_format == 'docx':
+                    output_path = convert_docx_to_format(input_path, output_format, OUTPUT_DIR)
+                elif input_format == 'pptx':
+                    output_path = convert_pptx_to_format(input_path, output_format, OUTPUT_DIR)
+                elif input_format == 'txt':
+                    output_path = convert_txt_to_format(input_path, output_format, OUTPUT_DIR)
+                elif input_format in ['png', 'jpg', 'jpeg', 'webp']:
+                    output_path = convert_image_to_format(input_path, output_format, OUTPUT_DIR)
+                else:
+                    raise HTTPException(status_code=400, detail=f"Unsupported input format: {input_format}")
+            
+            # Return the converted file with caching headers
+            # Cache-Control: no-store because converted files are unique and ephemeral
+            headers = {'Cache-Control': 'no-store'}
+            trace_id = current_trace_id()
+            if trace_id:
+                headers['X-Trace-Id'] = trace_id
+            
+            return FileResponse(
+                path=output_path,
+                # Multi-page outputs come back as an archive, so keep its extension
+                filename=f"converted{output_path.suffix}",
+                media_type="application/octet-stream",
+                headers=headers
             )
-        
-        # Route to appropriate converter
-        output_filename = f"{unique_id}_converted.{output_format}"
-        output_path = OUTPUT_DIR / output_filename
-        
-        if input_format == 'pdf':
-            output_path = convert_pdf_to_format(input_path, output_format, OUTPUT_DIR)
-        elif input_format == 'docx':
-            output_path = convert_docx_to_format(input_path, output_format, OUTPUT_DIR)
-        elif input_format == 'pptx':
-            output_path = convert_pptx_to_format(input_path, output_format, OUTPUT_DIR)
-        elif input_format == 'txt':
-            output_path = convert_txt_to_format(input_path, output_format, OUTPUT_DIR)
-        elif input_format in ['png', 'jpg', 'jpeg', 'webp']:
-            output_path = convert_image_to_format(input_path, output_format, OUTPUT_DIR)
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported input format: {input_format}")
-        
-        # Return the converted file with caching headers
-        # Cache-Control: no-store because converted files are unique and ephemeral
-        headers = {'Cache-Control': 'no-store'}
-        
-        return FileResponse(
-            path=output_path,
-            filename=f"converted.{output_format}",
-            media_type="application/octet-stream",
-            headers=headers
-        )
     
     except HTTPException:
         raise
+    except InvalidPageRange:
+        raise HTTPException(status_code=400, detail="Invalid page range")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Conversion error: {str(e)}")
     finally:
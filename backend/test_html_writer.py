@@ -0,0 +1,86 @@
+"""
+Behaviour checks for the streaming HTML writer
+Run with: python -m pytest test_html_writer.py
+"""
+
+from html_writer import HTMLWriter
+
+
+def _write(tmp_path, build, title="Doc"):
+    output_path = tmp_path / "out.html"
+    with HTMLWriter(output_path, title) as html:
+        build(html)
+    return output_path.read_text(encoding='utf-8')
+
+
+def _body(document: str) -> str:
+    return document.split("<body>\n", 1)[1].rsplit("</body>", 1)[0]
+
+
+def test_text_is_escaped_in_every_block(tmp_path):
+    payload = "<script>alert('x')</script> & more"
+    escaped = "&lt;script&gt;alert('x')&lt;/script&gt; &amp; more"
+
+    body = _body(_write(tmp_path, lambda html: (
+        html.heading(2, payload),
+        html.paragraph(payload),
+        html.list_item(payload),
+        html.table([[payload]]),
+        html.page(payload),
+        html.write_text(payload),
+    )))
+
+    assert "<script>" not in body
+    assert f"<h2>{escaped}</h2>" in body
+    assert f"<p>{escaped}</p>" in body
+    assert f"<li>{escaped}</li>" in body
+    assert f"<td>{escaped}</td>" in body
+    assert f"<div class='page'>{escaped}</div>" in body
+
+
+def test_title_is_escaped(tmp_path):
+    document = _write(tmp_path, lambda html: None, title="</title><b>")
+    assert "<title>&lt;/title&gt;&lt;b&gt;</title>" in document
+
+
+def test_lists_open_switch_and_close(tmp_path):
+    body = _body(_write(tmp_path, lambda html: (
+        html.list_item("a"),
+        html.list_item("b"),
+        html.list_item("one", ordered=True),
+        html.paragraph("after"),
+        html.list_item("trailing"),
+    )))
+
+    assert body == (
+        "<ul>\n<li>a</li>\n<li>b</li>\n</ul>\n"
+        "<ol>\n<li>one</li>\n</ol>\n"
+        "<p>after</p>\n"
+        "<ul>\n<li>trailing</li>\n</ul>\n"
+    )
+
+
+def test_page_keeps_line_breaks(tmp_path):
+    body = _body(_write(tmp_path, lambda html: html.page("line 1\nline <2>")))
+    assert body == "<div class='page'>line 1<br>\nline &lt;2&gt;</div>\n"
+
+
+def test_copy_text_file_streams_in_chunks(tmp_path):
+    source = tmp_path / "in.txt"
+    source.write_text("a<b&c\n" * 1000, encoding='utf-8')
+
+    # A tiny chunk size splits the text mid-entity-candidate; escaping must still hold
+    body = _body(_write(tmp_path, lambda html: html.copy_text_file(source, chunk_size=4)))
+    assert body == "a&lt;b&amp;c\n" * 1000
+
+
+def test_document_is_closed_when_an_error_is_raised(tmp_path):
+    output_path = tmp_path / "out.html"
+    try:
+        with HTMLWriter(output_path, "Doc") as html:
+            html.list_item("a")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert output_path.read_text(encoding='utf-8').endswith("</ul>\n</body>\n</html>\n")
@@ -0,0 +1,237 @@
+"""
+Request Tracing and Profiling
+Optional OpenTelemetry spans around each conversion stage, plus a sampling profiler
+that dumps a flame graph for any conversion slower than a threshold
+
+Both are off by default and configured through environment variables:
+    TRACE_EXPORTER       "file" (JSON lines in TRACE_FILE) or "otlp" (OTEL_EXPORTER_OTLP_* settings)
+    TRACE_FILE           Span output for the "file" exporter (default: traces.jsonl)
+    PROFILE_SLOW_MS      Dump a profile for conversions slower than this many milliseconds
+    PROFILE_DIR          Where profiles are written (default: profiles)
+    PROFILE_INTERVAL_MS  Sampling interval (default: 5)
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from functools import wraps
+from pathlib import Path
+
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "").lower()
+TRACE_FILE = Path(os.getenv("TRACE_FILE", "traces.jsonl"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+_tracer = None
+_provider = None
+
+# Profiler for the conversion running in the current context, so pool threads doing
+# work for it can register themselves to be sampled
+_active_profiler = contextvars.ContextVar("active_profiler", default=None)
+
+
+def init_tracing():
+    """
+    Sets up the OpenTelemetry tracer if TRACE_EXPORTER is set
+    opentelemetry-sdk (and the OTLP exporter for "otlp") is only imported when enabled
+    """
+    global _tracer, _provider
+    if not TRACE_EXPORTER or _tracer is not None:
+        return
+
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if TRACE_EXPORTER == 'file':
+        # One JSON span per line, appended so several workers can share the file
+        exporter = ConsoleSpanExporter(
+            out=open(TRACE_FILE, 'a', encoding='utf-8', buffering=1),
+            formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    elif TRACE_EXPORTER == 'otlp':
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+    else:
+        raise ValueError(f"Unsupported TRACE_EXPORTER: {TRACE_EXPORTER}")
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": "convertwebapp-backend"}))
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("convertwebapp")
+
+
+def shutdown_tracing():
+    """
+    Flushes any spans still queued for export
+    """
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = None
+    _provider = None
+
+
+def span(name: str, **attributes):
+    """
+    Context manager for a tracing span; does nothing when tracing is disabled
+    """
+    if _tracer is None:
+        return nullcontext()
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def record_span(name: str, start_ns: int, end_ns: int, **attributes):
+    """
+    Records an already finished span from explicit time.time_ns() timestamps
+    Used for stages that happen outside our code, e.g. receiving the request body
+    """
+    if _tracer is None:
+        return
+    attributes = {key: value for key, value in attributes.items() if value is not None}
+    _tracer.start_span(name, start_time=start_ns, attributes=attributes).end(end_time=end_ns)
+
+
+def traced(func):
+    """
+    Decorator that wraps a converter function in a span named after it
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(f"converter.{func.__name__}"):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def in_current_context(func):
+    """
+    Binds func to a copy of the caller's context for running on a pool thread
+    Spans opened by func then nest under the caller's current span, and the thread is
+    sampled by the caller's SlowConversionProfiler while func runs. Call once per
+    submission: a context can't be entered by two threads at the same time.
+    """
+    context = contextvars.copy_context()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.run(_run_sampled, func, args, kwargs)
+    return wrapper
+
+
+def _run_sampled(func, args, kwargs):
+    """
+    Runs func, sampling this thread with the active conversion's profiler (if any)
+    """
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return func(*args, **kwargs)
+    thread_id = threading.get_ident()
+    profiler.add_thread(thread_id, "pool thread")
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.remove_thread(thread_id)
+
+
+def current_trace_id():
+    """
+    Returns the active trace id as hex, or None when tracing is disabled
+    """
+    if _tracer is None:
+        return None
+    from opentelemetry import trace
+    context = trace.get_current_span().get_span_context()
+    return format(context.trace_id, '032x') if context.is_valid else None
+
+
+class SlowConversionProfiler:
+    """
+    Samples the calling thread's stack on a background thread while active, along with
+    any pool threads running work submitted through in_current_context (e.g. archive
+    page encoding). Stacks are rooted at "request thread" or "pool thread".
+    Worker processes (the PDF to DOCX parsing pool) are not sampled; their time shows up
+    as the request thread waiting on future.result().
+    On exit, if the block took longer than the threshold, the samples are written to
+    PROFILE_DIR/<name>.folded in collapsed-stack format (flamegraph.pl, speedscope)
+    """
+
+    def __init__(self, name: str, threshold_ms: float = PROFILE_SLOW_MS,
+                 interval_ms: float = PROFILE_INTERVAL_MS):
+        self.name = name
+        self.threshold_ms = threshold_ms
+        self.interval = interval_ms / 1000
+        self.elapsed_ms = None
+        self.profile_path = None
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._threads = {}
+        self._threads_lock = threading.Lock()
+        self._sampler = None
+        self._started = None
+        self._token = None
+
+    def __enter__(self):
+        self.add_thread(threading.get_ident(), "request thread")
+        self._token = _active_profiler.set(self)
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._sampler.join()
+        _active_profiler.reset(self._token)
+        self.elapsed_ms = (time.perf_counter() - self._started) * 1000
+        if self.elapsed_ms >= self.threshold_ms and self._stacks:
+            self.profile_path = self._dump()
+            print(f"Slow conversion ({self.elapsed_ms:.0f} ms), profile written to {self.profile_path}")
+        return False
+
+    def add_thread(self, thread_id: int, label: str):
+        with self._threads_lock:
+            self._threads[thread_id] = label
+
+    def remove_thread(self, thread_id: int):
+        with self._threads_lock:
+            self._threads.pop(thread_id, None)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            with self._threads_lock:
+                threads = list(self._threads.items())
+            frames = sys._current_frames()
+            for thread_id, label in threads:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if stack:
+                    stack.append(label)
+                    self._stacks[';'.join(reversed(stack))] += 1
+
+    def _dump(self) -> Path:
+        PROFILE_DIR.mkdir(exist_ok=True)
+        profile_path = PROFILE_DIR / f"{self.name}.folded"
+        with open(profile_path, 'w', encoding='utf-8') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return profile_path
+
+
+def profile_conversion(name: str):
+    """
+    Returns a SlowConversionProfiler when PROFILE_SLOW_MS is set, otherwise a no-op context
+    """
+    if PROFILE_SLOW_MS <= 0:
+        return nullcontext()
+    return SlowConversionProfiler(name)
@@ -115,7 +115,10 @@ export default function ConverterFeature({
             const url = window.URL.createObjectURL(blob);
             const a = document.createElement('a');
             a.href = url;
-            a.download = `converted_${Date.now()}.${selectedFormat}`; // Unique filename
+            // Multi-page outputs come back as an archive, so prefer the server's extension
+            const disposition = response.headers.get('Content-Disposition') || '';
+            const serverExtension = disposition.match(/filename="?[^";]*\.([A-Za-z0-9]+)"?/)?.[1];
+            a.download = `converted_${Date.now()}.${serverExtension || selectedFormat}`; // Unique filename
             document.body.appendChild(a);
             a.click();
 